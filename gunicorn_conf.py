@@ -0,0 +1,32 @@
+"""
+Gunicorn Configuration
+
+Production process layout: several Uvicorn workers behind one Gunicorn
+master so requests spread across all CPU cores.
+
+Run with: gunicorn -c gunicorn_conf.py main:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# os.cpu_count() reports host CPUs even inside a CPU-limited container, and each
+# worker holds up to maxPoolSize (50) Mongo connections, so the default is
+# capped. Set WEB_CONCURRENCY to size workers for the actual CPU allocation.
+MAX_DEFAULT_WORKERS = 8
+if hasattr(os, "sched_getaffinity"):
+    cpus = len(os.sched_getaffinity(0))
+else:
+    cpus = os.cpu_count() or 1
+workers = int(os.getenv("WEB_CONCURRENCY", min(2 * cpus + 1, MAX_DEFAULT_WORKERS)))
+worker_class = "uvicorn.workers.UvicornWorker"
+worker_tmp_dir = "/dev/shm"
+keepalive = 5
+
+# Each worker imports main after fork, so the pre-encoded JSON blobs and the
+# Mongo client are built once per worker process. Preloading would share the
+# blobs but hand every worker a Mongo client created before the fork.
+preload_app = False
+
+accesslog = None
+loglevel = os.getenv("LOG_LEVEL", "warning")
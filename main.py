@@ -1,86 +1,117 @@
+import hashlib
+import logging
 import os
-from fastapi import FastAPI, HTTPException
+import re
+import time
+from contextlib import asynccontextmanager
+import msgspec
+import orjson
+from brotli_asgi import BrotliMiddleware
+from bson import ObjectId
+from email_validator import EmailNotValidError, validate_email
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, HttpUrl, TypeAdapter, ValidationError
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
 
-from database import db, create_document, get_documents
-from schemas import Product, DistributorApplication, CheckoutRequest
+from database import db, create_document, find_one, get_documents
+from schemas import Product, DistributorApplication, CheckoutRequest, CheckoutRequestStruct
 
-app = FastAPI(title="Luxuria API")
+logger = logging.getLogger(__name__)
+
+
+def _default(o: Any) -> str:
+    # ObjectId, HttpUrl and similar values are encoded as their string form
+    return str(o)
+
+
+class LuxuriaJSONResponse(ORJSONResponse):
+    """ORJSONResponse that stringifies ObjectId and other non-JSON values"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NAIVE_UTC)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
 # -------- Sample catalog (used when DB is empty or unavailable) --------
 
-def sample_products() -> List[dict]:
+_SAMPLE_PRODUCTS: List[dict] = [
+    {
+        "_id": "demo-royal-chrono",
+        "title": "Royal Chrono 42mm",
+        "description": "Swiss automatic chronograph crafted in 18k rose gold with sapphire crystal.",
+        "price": 18990.0,
+        "category": "watches",
+        "images": [
+            "https://images.unsplash.com/photo-1518544801976-3e188ea47b1d?q=80&w=1600&auto=format&fit=crop",
+            "https://images.unsplash.com/photo-1523170335258-f5ed11844a49?q=80&w=1600&auto=format&fit=crop"
+        ],
+        "in_stock": True,
+        "featured": True,
+    },
+    {
+        "_id": "demo-diamond-aurora",
+        "title": "Aurora Diamond Necklace",
+        "description": "Hand-set VS1 diamonds on platinum. Timeless brilliance for evening glamour.",
+        "price": 12950.0,
+        "category": "jewelry",
+        "images": [
+            "https://images.unsplash.com/photo-1520962918287-7448c2878f65?q=80&w=1600&auto=format&fit=crop"
+        ],
+        "in_stock": True,
+        "featured": True,
+    },
+    {
+        "_id": "demo-maldives-escape",
+        "title": "Maldives Water Villa Escape",
+        "description": "5 nights in an overwater villa with private plunge pool and butler service.",
+        "price": 8990.0,
+        "category": "holidays",
+        "images": [
+            "https://images.unsplash.com/photo-1500375592092-40eb2168fd21?q=80&w=1600&auto=format&fit=crop"
+        ],
+        "in_stock": True,
+        "featured": True,
+    },
+    {
+        "_id": "demo-silk-sofa",
+        "title": "Silk & Walnut Lounge Sofa",
+        "description": "Handcrafted Italian sofa in walnut with bespoke silk upholstery.",
+        "price": 7490.0,
+        "category": "home",
+        "images": [
+            "https://images.unsplash.com/photo-1501045661006-fcebe0257c3f?q=80&w=1600&auto=format&fit=crop"
+        ],
+        "in_stock": True,
+        "featured": False,
+    },
+    {
+        "_id": "demo-platinum-massager",
+        "title": "Platinum Deep Tissue Massager",
+        "description": "Medical-grade percussive therapy device with intelligent pressure control.",
+        "price": 499.0,
+        "category": "health",
+        "images": [
+            "https://images.unsplash.com/photo-1615634260167-c8cdede054de?q=80&w=1600&auto=format&fit=crop"
+        ],
+        "in_stock": True,
+        "featured": False,
+    },
+]
+
+# Encoded sample products keyed by _id
+_SAMPLE_BY_ID: Dict[str, bytes] = {p["_id"]: orjson.dumps(p) for p in _SAMPLE_PRODUCTS}
+
+# Matches a 24-character hex ObjectId string
+_OID_RE = re.compile(r"[0-9a-fA-F]{24}").fullmatch
+
+def _filter_samples(category: Optional[str], featured: Optional[bool]) -> List[dict]:
     return [
-        {
-            "_id": "demo-royal-chrono",
-            "title": "Royal Chrono 42mm",
-            "description": "Swiss automatic chronograph crafted in 18k rose gold with sapphire crystal.",
-            "price": 18990.0,
-            "category": "watches",
-            "images": [
-                "https://images.unsplash.com/photo-1518544801976-3e188ea47b1d?q=80&w=1600&auto=format&fit=crop",
-                "https://images.unsplash.com/photo-1523170335258-f5ed11844a49?q=80&w=1600&auto=format&fit=crop"
-            ],
-            "in_stock": True,
-            "featured": True,
-        },
-        {
-            "_id": "demo-diamond-aurora",
-            "title": "Aurora Diamond Necklace",
-            "description": "Hand-set VS1 diamonds on platinum. Timeless brilliance for evening glamour.",
-            "price": 12950.0,
-            "category": "jewelry",
-            "images": [
-                "https://images.unsplash.com/photo-1520962918287-7448c2878f65?q=80&w=1600&auto=format&fit=crop"
-            ],
-            "in_stock": True,
-            "featured": True,
-        },
-        {
-            "_id": "demo-maldives-escape",
-            "title": "Maldives Water Villa Escape",
-            "description": "5 nights in an overwater villa with private plunge pool and butler service.",
-            "price": 8990.0,
-            "category": "holidays",
-            "images": [
-                "https://images.unsplash.com/photo-1500375592092-40eb2168fd21?q=80&w=1600&auto=format&fit=crop"
-            ],
-            "in_stock": True,
-            "featured": True,
-        },
-        {
-            "_id": "demo-silk-sofa",
-            "title": "Silk & Walnut Lounge Sofa",
-            "description": "Handcrafted Italian sofa in walnut with bespoke silk upholstery.",
-            "price": 7490.0,
-            "category": "home",
-            "images": [
-                "https://images.unsplash.com/photo-1501045661006-fcebe0257c3f?q=80&w=1600&auto=format&fit=crop"
-            ],
-            "in_stock": True,
-            "featured": False,
-        },
-        {
-            "_id": "demo-platinum-massager",
-            "title": "Platinum Deep Tissue Massager",
-            "description": "Medical-grade percussive therapy device with intelligent pressure control.",
-            "price": 499.0,
-            "category": "health",
-            "images": [
-                "https://images.unsplash.com/photo-1615634260167-c8cdede054de?q=80&w=1600&auto=format&fit=crop"
-            ],
-            "in_stock": True,
-            "featured": False,
-        },
+        p
+        for p in _SAMPLE_PRODUCTS
+        if (not category or p["category"] == category)
+        and (featured is None or p["featured"] == featured)
     ]
 
 CATEGORIES = [
@@ -91,18 +122,120 @@ CATEGORIES = [
     {"id": "health", "name": "Health"},
 ]
 
+def _etag(content: bytes) -> str:
+    # Weak, since identity, gzip and br encodings of the body share one tag
+    return 'W/"' + hashlib.md5(content).hexdigest() + '"'
+
+def _cached_json(request: Request, content: bytes, etag: str, cache_control: str) -> Response:
+    # Answer conditional GETs for static payloads without resending the body
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    opaque_tag = etag.removeprefix("W/")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or opaque_tag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+_CATEGORIES_JSON = orjson.dumps(CATEGORIES)
+_CATEGORIES_ETAG = _etag(_CATEGORIES_JSON)
+_ROOT_JSON = orjson.dumps({"message": "Luxuria backend is running"})
+
+# Encoded fallback responses for every (category, featured) combination
+_PRECOMPUTED: Dict[Tuple[str, Optional[bool]], bytes] = {
+    (category, featured): orjson.dumps(_filter_samples(category, featured))
+    for category in ["", *(c["id"] for c in CATEGORIES)]
+    for featured in (None, True, False)
+}
+_SAMPLE_JSON = _PRECOMPUTED[("", None)]
+_SAMPLE_ETAG = _etag(_SAMPLE_JSON)
+
+# Fields returned by product endpoints; Mongo renders _id as a string
+_PRODUCT_PROJECTION = {
+    "_id": {"$toString": "$_id"},
+    "title": 1,
+    "price": 1,
+    "category": 1,
+    "images": 1,
+    "in_stock": 1,
+    "featured": 1,
+    "description": 1,
+}
+
+# Names of product indexes confirmed by create_indexes at startup
+_READY_INDEXES: Set[str] = set()
+
+def _product_index_hint(category: Optional[str], featured: Optional[bool]) -> Optional[str]:
+    # Pin the plan to the indexes created on startup
+    if category:
+        hint = "ix_category_featured"
+    elif featured is True:
+        # The partial index only holds featured products
+        hint = "ix_featured_partial"
+    else:
+        return None
+    # Mongo rejects a hint naming a missing index, so only hint ones we created
+    return hint if hint in _READY_INDEXES else None
+
+# ----------------------------- Startup --------------------------------
+
+_PRODUCT_INDEXES = [
+    ([("category", 1), ("featured", 1)], {"name": "ix_category_featured"}),
+    (
+        [("featured", 1)],
+        {"name": "ix_featured_partial", "partialFilterExpression": {"featured": True}},
+    ),
+]
+
+async def create_indexes() -> None:
+    if db is None:
+        return
+    for keys, options in _PRODUCT_INDEXES:
+        try:
+            await db.product.create_index(keys, **options)
+            _READY_INDEXES.add(options["name"])
+        except Exception as e:
+            # Endpoints still work without the index, just slower
+            logger.warning("Could not create product index %s: %s", options["name"], e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await create_indexes()
+    yield
+
+app = FastAPI(
+    title="Luxuria API",
+    default_response_class=LuxuriaJSONResponse,
+    lifespan=lifespan,
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+# Brotli for clients that accept it, gzip otherwise. GZip wraps Brotli and
+# passes through responses that already carry a Content-Encoding.
+app.add_middleware(BrotliMiddleware, quality=4, minimum_size=500, gzip_fallback=False)
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
 # ----------------------------- Routes ---------------------------------
 
-@app.get("/")
-def read_root():
-    return {"message": "Luxuria backend is running"}
+@app.get("/", response_model=None, response_class=LuxuriaJSONResponse)
+async def read_root():
+    return Response(content=_ROOT_JSON, media_type="application/json")
 
-@app.get("/api/categories")
-def get_categories():
-    return CATEGORIES
+@app.get("/api/categories", response_model=None, response_class=LuxuriaJSONResponse)
+async def get_categories(request: Request):
+    return _cached_json(request, _CATEGORIES_JSON, _CATEGORIES_ETAG, "public, max-age=3600")
 
-@app.get("/api/products")
-def list_products(category: Optional[str] = None, featured: Optional[bool] = None):
+@app.get("/api/products", response_model=None, response_class=LuxuriaJSONResponse)
+async def list_products(
+    request: Request, category: Optional[str] = None, featured: Optional[bool] = None
+):
     # Try DB first; if unavailable or empty, return sample catalog
     try:
         filter_query = {}
@@ -110,71 +243,187 @@ def list_products(category: Optional[str] = None, featured: Optional[bool] = Non
             filter_query["category"] = category
         if featured is not None:
             filter_query["featured"] = featured
-        docs = get_documents("product", filter_query, limit=100)
-        for d in docs:
-            d["_id"] = str(d.get("_id"))
-            if "images" in d:
-                d["images"] = [str(x) for x in d["images"]]
+        docs = await get_documents(
+            "product",
+            filter_query,
+            limit=100,
+            projection=_PRODUCT_PROJECTION,
+            hint=_product_index_hint(category, featured),
+        )
         if docs:
-            return docs
+            return LuxuriaJSONResponse(docs)
     except Exception:
         pass
-    # Fallback to samples and filter locally
-    prods = sample_products()
-    if category:
-        prods = [p for p in prods if p["category"] == category]
-    if featured is not None:
-        prods = [p for p in prods if p.get("featured") is featured]
-    return prods
+    # Fallback to the pre-encoded sample catalog
+    if not category and featured is None:
+        # Revalidate on every use so clients pick up DB data once it is back
+        return _cached_json(request, _SAMPLE_JSON, _SAMPLE_ETAG, "public, no-cache")
+    content = _PRECOMPUTED.get((category or "", featured))
+    if content is None:
+        content = orjson.dumps(_filter_samples(category, featured))
+    return Response(content=content, media_type="application/json")
 
-@app.get("/api/products/{product_id}")
-def get_product(product_id: str):
+@app.get("/api/products/{product_id}", response_model=None, response_class=LuxuriaJSONResponse)
+async def get_product(product_id: str):
     # Try DB by _id
     try:
-        from bson import ObjectId
-        if ObjectId.is_valid(product_id):
-            docs = get_documents("product", {"_id": ObjectId(product_id)}, limit=1)
-            if docs:
-                d = docs[0]
-                d["_id"] = str(d.get("_id"))
-                if "images" in d:
-                    d["images"] = [str(x) for x in d["images"]]
-                return d
+        if _OID_RE(product_id) is not None:
+            doc = await find_one(
+                "product", {"_id": ObjectId(product_id)}, projection=_PRODUCT_PROJECTION
+            )
+            if doc is not None:
+                return LuxuriaJSONResponse(doc)
     except Exception:
         pass
     # Fallback to sample by id
-    for p in sample_products():
-        if p["_id"] == product_id:
-            return p
+    content = _SAMPLE_BY_ID.get(product_id)
+    if content is not None:
+        return Response(content=content, media_type="application/json")
     raise HTTPException(status_code=404, detail="Product not found")
 
-@app.post("/api/products")
-def create_product(product: Product):
+@app.post("/api/products", response_model=None, response_class=LuxuriaJSONResponse)
+async def create_product(product: Product):
     try:
-        inserted_id = create_document("product", product)
+        inserted_id = await create_document("product", product.model_dump(mode="json"))
         return {"id": inserted_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/checkout")
-def checkout(data: CheckoutRequest):
+def _inline_schema(model: Type[BaseModel]) -> dict:
+    # Resolve $defs in place so the schema can be embedded in openapi_extra
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def resolve(node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref is not None and ref.startswith("#/$defs/"):
+                return resolve(defs[ref[len("#/$defs/"):]])
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
+# Lax mode coerces numeric strings such as "1.5" the way Pydantic does
+_checkout_decoder = msgspec.json.Decoder(CheckoutRequestStruct, strict=False)
+
+_PATH_TOKEN_RE = re.compile(r"\.([^.\[]+)|\[(\d+)\]")
+_MISSING_FIELD_RE = re.compile(r"Object missing required field `(.+)`")
+
+def _msgspec_error_detail(e: msgspec.DecodeError) -> List[dict]:
+    # Shape msgspec errors like FastAPI's RequestValidationError detail
+    msg, _, path = str(e).partition(" - at `")
+    loc: List[Any] = ["body"]
+    for key, index in _PATH_TOKEN_RE.findall(path.rstrip("`")):
+        loc.append(key or int(index))
+    missing = _MISSING_FIELD_RE.fullmatch(msg)
+    if missing:
+        loc.append(missing.group(1))
+        error_type = "missing"
+    elif isinstance(e, msgspec.ValidationError):
+        error_type = "value_error"
+    else:
+        error_type = "json_invalid"
+    return [{"type": error_type, "loc": loc, "msg": msg}]
+
+# Same parser as OrderItem.image, so the enforced and documented rules agree
+_http_url = TypeAdapter(HttpUrl)
+
+def _check_checkout(data: CheckoutRequestStruct) -> List[dict]:
+    # Checks msgspec cannot express; normalizes quantities to int in place
+    errors = []
+    for i, item in enumerate(data.items):
+        if isinstance(item.quantity, float):
+            if item.quantity.is_integer():
+                item.quantity = int(item.quantity)
+            else:
+                errors.append({
+                    "type": "int_from_float",
+                    "loc": ["body", "items", i, "quantity"],
+                    "msg": "Input should be a valid integer, got a number with a fractional part",
+                })
+        if item.image is not None:
+            try:
+                item.image = str(_http_url.validate_python(item.image))
+            except ValidationError as e:
+                error = e.errors()[0]
+                errors.append({
+                    "type": error["type"],
+                    "loc": ["body", "items", i, "image"],
+                    "msg": error["msg"],
+                })
     try:
-        order_id = create_document("order", data.model_dump())
+        # Store the normalized address, as EmailStr did
+        data.customer_email = validate_email(
+            data.customer_email, check_deliverability=False
+        ).normalized
+    except EmailNotValidError as e:
+        errors.append({
+            "type": "value_error",
+            "loc": ["body", "customer_email"],
+            "msg": f"value is not a valid email address: {e}",
+        })
+    return errors
+
+@app.post(
+    "/api/checkout",
+    response_model=None,
+    response_class=LuxuriaJSONResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": _inline_schema(CheckoutRequest)}},
+            "required": True,
+        }
+    },
+)
+async def checkout(request: Request):
+    # Decode with msgspec rather than Pydantic; the body is documented above
+    try:
+        data = _checkout_decoder.decode(await request.body())
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=_msgspec_error_detail(e))
+    errors = _check_checkout(data)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    try:
+        payload = msgspec.to_builtins(data)
+        order_id = await create_document("order", payload)
         return {"status": "success", "order_id": order_id}
     except Exception:
         # If DB not available, still return success demo
         return {"status": "success", "order_id": "demo-order-1234"}
 
-@app.post("/api/distributor/apply")
-def distributor_apply(apply: DistributorApplication):
+@app.post("/api/distributor/apply", response_model=None, response_class=LuxuriaJSONResponse)
+async def distributor_apply(apply: DistributorApplication):
     try:
-        app_id = create_document("distributorapplication", apply)
+        # JSON mode turns the HttpUrl website into a plain string BSON can store
+        payload = apply.model_dump(mode="json")
+        app_id = await create_document("distributorapplication", payload)
         return {"status": "received", "application_id": app_id}
     except Exception:
         return {"status": "received", "application_id": "demo-application-1234"}
 
-@app.get("/test")
-def test_database():
+# Environment status reported by /test, fixed for the process lifetime
+_DATABASE_URL_STATUS = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
+_DATABASE_NAME_STATUS = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
+
+_COLLECTIONS_TTL = 30.0
+# (expiry on the monotonic clock, first ten collection names)
+_COLLECTIONS_CACHE: Tuple[float, Tuple[str, ...]] = (0.0, ())
+
+async def _collection_names() -> Tuple[str, ...]:
+    global _COLLECTIONS_CACHE
+    expiry, names = _COLLECTIONS_CACHE
+    now = time.monotonic()
+    if now >= expiry:
+        names = tuple((await db.list_collection_names())[:10])
+        _COLLECTIONS_CACHE = (now + _COLLECTIONS_TTL, names)
+    return names
+
+@app.get("/test", response_model=None, response_class=LuxuriaJSONResponse)
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -191,8 +440,7 @@ def test_database():
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
-                response["collections"] = collections[:10]
+                response["collections"] = await _collection_names()
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
                 response["database"] = f"⚠️  Connected but Error: {str(e)[:50]}"
@@ -201,13 +449,21 @@ def test_database():
     except Exception as e:
         response["database"] = f"❌ Error: {str(e)[:50]}"
 
-    import os as _os
-    response["database_url"] = "✅ Set" if _os.getenv("DATABASE_URL") else "❌ Not Set"
-    response["database_name"] = "✅ Set" if _os.getenv("DATABASE_NAME") else "❌ Not Set"
+    response["database_url"] = _DATABASE_URL_STATUS
+    response["database_name"] = _DATABASE_NAME_STATUS
 
     return response
 
+# Local development runner; production uses gunicorn_conf.py
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+        log_level="warning",
+    )
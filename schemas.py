@@ -11,8 +11,10 @@ Model name is converted to lowercase for the collection name:
 - BlogPost -> "blogs" collection
 """
 
+import msgspec
+from msgspec import Meta
 from pydantic import BaseModel, Field, HttpUrl, EmailStr
-from typing import Optional, List
+from typing import Annotated, Optional, List, Union
 
 class User(BaseModel):
     """
@@ -68,6 +70,27 @@ class CheckoutRequest(BaseModel):
 # Add your own schemas here:
 # --------------------------------------------------
 
+# msgspec mirrors of the checkout models, used to decode request bodies on
+# the ingest path. The Pydantic models above remain the documented schema.
+# Whole-number quantities, email addresses and image URLs are checked after
+# decoding.
+
+class OrderItemStruct(msgspec.Struct, omit_defaults=True):
+    product_id: str
+    title: str
+    # Floats such as 1.0 are accepted like Pydantic but must be whole numbers
+    quantity: Union[Annotated[int, Meta(ge=1)], Annotated[float, Meta(ge=1)]]
+    price: Annotated[float, Meta(ge=0)]
+    image: Optional[str] = None
+
+class CheckoutRequestStruct(msgspec.Struct):
+    items: List[OrderItemStruct]
+    customer_name: str
+    customer_email: str
+    address: str
+    city: str
+    country: str
+
 # Note: The Flames database viewer will automatically:
 # 1. Read these schemas from GET /schema endpoint
 # 2. Use them for document validation when creating/editing
@@ -0,0 +1,97 @@
+"""
+Checkout Validation Tests
+
+Pins the FastAPI-style 422 detail built from msgspec errors, so a msgspec
+upgrade that changes its error wording fails here instead of in clients.
+
+Run with: python -m pytest -q
+"""
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+client = TestClient(app)
+
+
+def valid_body() -> dict:
+    return {
+        "items": [{"product_id": "p1", "title": "Watch", "quantity": 1, "price": 10.0}],
+        "customer_name": "Ada",
+        "customer_email": "ada@example.com",
+        "address": "1 Main St",
+        "city": "Geneva",
+        "country": "CH",
+    }
+
+
+def errors_for(**kwargs) -> list:
+    response = client.post("/api/checkout", **kwargs)
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert isinstance(detail, list)
+    for error in detail:
+        assert {"type", "loc", "msg"} <= error.keys()
+    return detail
+
+
+def test_missing_field():
+    body = valid_body()
+    del body["customer_email"]
+    [error] = errors_for(json=body)
+    assert error["type"] == "missing"
+    assert error["loc"] == ["body", "customer_email"]
+
+
+def test_missing_field_inside_item():
+    body = valid_body()
+    del body["items"][0]["price"]
+    [error] = errors_for(json=body)
+    assert error["type"] == "missing"
+    assert error["loc"] == ["body", "items", 0, "price"]
+
+
+def test_bad_type_inside_item():
+    body = valid_body()
+    body["items"][0]["quantity"] = "many"
+    [error] = errors_for(json=body)
+    assert error["type"] == "value_error"
+    assert error["loc"] == ["body", "items", 0, "quantity"]
+
+
+def test_constraint_inside_item():
+    body = valid_body()
+    body["items"][0]["price"] = -1
+    [error] = errors_for(json=body)
+    assert error["type"] == "value_error"
+    assert error["loc"] == ["body", "items", 0, "price"]
+
+
+def test_malformed_json():
+    [error] = errors_for(content=b'{"items": [', headers={"Content-Type": "application/json"})
+    assert error["type"] == "json_invalid"
+    assert error["loc"] == ["body"]
+
+
+def test_fractional_quantity():
+    body = valid_body()
+    body["items"][0]["quantity"] = 1.5
+    [error] = errors_for(json=body)
+    assert error["type"] == "int_from_float"
+    assert error["loc"] == ["body", "items", 0, "quantity"]
+
+
+def test_invalid_email():
+    body = valid_body()
+    body["customer_email"] = "not-an-email"
+    [error] = errors_for(json=body)
+    assert error["type"] == "value_error"
+    assert error["loc"] == ["body", "customer_email"]
+
+
+def test_invalid_image_url():
+    body = valid_body()
+    body["items"][0]["image"] = "http://:::"
+    [error] = errors_for(json=body)
+    assert error["type"] == "url_parsing"
+    assert error["loc"] == ["body", "items", 0, "image"]